@@ -1,11 +1,64 @@
 import streamlit as st
+import asyncio
+import io
 import os
-import json
-import pandas as pd
 import re
+from concurrent.futures import ThreadPoolExecutor, wait
+import diskcache
+import orjson
 from dotenv import load_dotenv
-from openai import OpenAI
-from tavily import TavilyClient
+
+# 餐厅/食品类结果黑名单 (一次编译，单次扫描)
+_BLACKLIST_RE = re.compile(r"steak|restaurant|menu|fogo de chao|steakhouse|chef|recipe", re.IGNORECASE)
+
+# 输入链接解析：可选协议 (含 // 协议相对写法) + 可选 www. + host + path
+_URL_RE = re.compile(r'^(?:(?:https?:)?//)?(?:www\.)?([^/?#\s]+)(?:/([^?#\s]*))?', re.I)
+_TWITTER_HOSTS = frozenset({"x.com", "twitter.com", "mobile.twitter.com"})
+_HANDLE_RE = re.compile(r"\w{1,15}")
+
+# URL 协议前缀
+_SCHEMES = ("http://", "https://")
+
+# 每条来源送入 prompt 的正文上限
+_CONTENT_LIMIT = 800
+
+# 本会话已分析链接的记录上限，超过后整体清空重新记录
+_SEEN_URLS_MAX = 2000
+
+# 搜索词：强制 Crypto 上下文 + 排除餐厅/实体店 + 角色关键词
+_BASE_CTX = "crypto OR blockchain OR web3 OR exchange OR token"
+_NEG = "-restaurant -steakhouse -chef -menu -food -dining -recipe"
+_ROLES_VC = "Partner OR Investor"
+_ROLES_PROJ = 'Founder OR CEO OR CMO OR "Head of Listing" OR "Head of BD"'
+
+# Prompt 模板：只有 4 个槽位会变，模块加载时构建一次
+_SYSTEM_PROMPT = "You are a JSON extractor. Output valid JSON only."
+_PROMPT_TMPL = """
+Target Project: "{project}"
+Context: Crypto/Web3 Industry.
+Detected Fingerprints: {fps}
+
+TASK: Extract verified Team Members and Official Contacts.
+
+CRITICAL RULES:
+1. **NO STEAKHOUSES**: If the content is about food/restaurants (e.g. "Fogo de Chao"), IGNORE IT.
+2. **LINK MATCHING**: You MUST try to find a URL from the "URL REGISTRY" for every person.
+   - If you see "Stephen Chen" in Source S1, and S1's URL is a LinkedIn profile, USE IT.
+   - Do NOT output "LinkedIn Profile" as text. Output the actual URL or "N/A".
+3. **RECALL**: If you find a person but no link, list them anyway.
+
+URL REGISTRY (Pick links from here):
+{reg}
+
+SEARCH CONTENT:
+{feed}
+
+OUTPUT JSON:
+{{
+    "team": [ {{ "name": "...", "role": "...", "linkedin": "URL/N/A", "twitter": "URL/N/A" }} ],
+    "contacts": [ {{ "type": "...", "value": "...", "note": "..." }} ]
+}}
+"""
 
 # ============================================================================
 # 1. 基础配置
@@ -31,18 +84,32 @@ with st.sidebar:
     deepseek_key = st.text_input("DeepSeek Key", value=os.getenv("DEEPSEEK_API_KEY", ""), type="password")
     tavily_key = st.text_input("Tavily Key", value=os.getenv("TAVILY_API_KEY", ""), type="password")
     st.info("💡 Tip: 即使填反了推特和官网，系统现在也能自动识别。")
+    
+    # 本会话已经分析过的来源链接 (只用于精简 prompt)，以及每个搜索条件最近一次的分析结果
+    if "seen_urls" not in st.session_state:
+        st.session_state.seen_urls = set()
+    if "last_results" not in st.session_state:
+        st.session_state.last_results = {}
+    if st.button("🔄 Reset seen URLs", help=f"当前已记录 {len(st.session_state.seen_urls)} 条链接"):
+        st.session_state.seen_urls.clear()
+        st.session_state.last_results.clear()
 
 if not deepseek_key or not tavily_key:
     st.warning("⚠️ 请先配置 API Keys")
     st.stop()
 
-# 初始化客户端
-try:
-    llm = OpenAI(api_key=deepseek_key, base_url="https://api.deepseek.com")
-    tavily = TavilyClient(api_key=tavily_key)
-except Exception as e:
-    st.error(f"Client Init Error: {e}")
-    st.stop()
+# 初始化客户端 (按 Key 缓存，rerun 时复用同一组客户端及其 keep-alive 连接池，省掉重复的 TLS 握手)
+# 重依赖在首次点击搜索时才导入，普通控件交互的 rerun 不承担这部分开销
+@st.cache_resource
+def _get_clients(deepseek_key, tavily_key):
+    from openai import OpenAI
+    from tavily import TavilyClient
+    
+    # 流式输出下超时按单次读取计算，120s 足够覆盖模型首个 token 前的等待
+    return (
+        OpenAI(api_key=deepseek_key, base_url="https://api.deepseek.com", timeout=120.0),
+        TavilyClient(api_key=tavily_key),  # >=0.8.0 内部复用同一个 requests.Session
+    )
 
 # ============================================================================
 # 2. 智能输入处理 (Smart Input Processor)
@@ -56,37 +123,30 @@ def auto_detect_fingerprints(input_website, input_twitter):
         "twitter_handle": None,
         "domain": None
     }
+    # 两个框都没填，直接返回空指纹
+    if not (input_website or input_twitter):
+        return fingerprints
     
     # 合并输入进行分析
     inputs = [input_website, input_twitter]
     
     for item in inputs:
         if not item: continue
-        item = item.strip().lower()
+        # 一次匹配拆出 host / path: https://www.x.com/Weex_Official -> (x.com, Weex_Official)
+        m = _URL_RE.match(item.strip().lower())
+        if not m: continue
+        host, path = m.group(1), m.group(2) or ""
         
         # 识别推特
-        if "x.com" in item or "twitter.com" in item:
+        if host in _TWITTER_HOSTS:
             # 提取 handle: x.com/Weex_Official -> Weex_Official
-            try:
-                # 移除末尾斜杠和参数
-                clean_url = item.split("?")[0].rstrip("/")
-                handle = clean_url.split("/")[-1]
-                if handle:
-                    fingerprints["twitter_handle"] = handle
-            except:
-                pass
+            handle = path.partition("/")[0]
+            if handle:
+                fingerprints["twitter_handle"] = handle
         
-        # 识别官网 (排除推特、领英)
-        elif "." in item and "linkedin" not in item:
-            # 提取域名: https://www.weex.com/ -> weex.com
-            try:
-                clean_url = item.replace("https://", "").replace("http://", "").split("/")[0]
-                # 移除 www.
-                if clean_url.startswith("www."):
-                    clean_url = clean_url[4:]
-                fingerprints["domain"] = clean_url
-            except:
-                pass
+        # 识别官网 (排除推特、领英): https://www.weex.com/ -> weex.com
+        elif "." in host and "linkedin" not in host:
+            fingerprints["domain"] = host
                 
     return fingerprints
 
@@ -96,65 +156,101 @@ def auto_detect_fingerprints(input_website, input_twitter):
 
 def generate_waterfall_queries(project_name, category, fps):
     queries = []
-    
-    # 基础过滤：强制 Crypto 上下文 + 排除餐厅/实体店
-    base_context = "crypto OR blockchain OR web3 OR exchange OR token"
-    negative_filter = "-restaurant -steakhouse -chef -menu -food -dining -recipe"
-    
-    # 角色关键词
-    if category == "VC":
-        roles = "Partner OR Investor"
-    else:
-        roles = "Founder OR CEO OR CMO OR \"Head of Listing\" OR \"Head of BD\""
+    roles = _ROLES_VC if category == "VC" else _ROLES_PROJ
 
     # --- Level 1: 精准狙击 (如果指纹存在) ---
     # 逻辑：很多 Crypto 人的领英简介会写 "Founder @Weex_Official"
-    if fps["twitter_handle"]:
-        queries.append(f"site:linkedin.com \"@{fps['twitter_handle']}\"")
-        queries.append(f"site:linkedin.com \"{fps['twitter_handle']}\"")
+    handle = (fps["twitter_handle"] or "").lstrip("@")
+    if handle:
+        # 只有合法的推特用户名才值得单独搜 "@handle"，否则与裸 handle 查询重复
+        if _HANDLE_RE.fullmatch(handle):
+            queries.append(f"site:linkedin.com \"@{handle}\"")
+        # handle 与官网主域名相同 (weex / weex.com) 时视为同一指纹，只保留下面的域名查询
+        if not fps["domain"] or fps["domain"].split(".", 1)[0] != handle:
+            queries.append(f"site:linkedin.com \"{handle}\"")
     
     if fps["domain"]:
         queries.append(f"site:linkedin.com \"{fps['domain']}\" {roles}")
 
-    # --- Level 2: 强关联搜索 (项目名 + 行业词) ---
-    # 逻辑：必须同时出现 Project Name 和 Crypto 词汇，否则不要
-    queries.append(f"site:linkedin.com/in/ \"{project_name}\" {base_context} {roles} {negative_filter}")
-    queries.append(f"site:linkedin.com/company/ \"{project_name}\" {base_context}")
-
-    # --- Level 3: 兜底搜索 (如果找不到领英，找其他来源) ---
-    queries.append(f"\"{project_name}\" {base_context} team listing contact {negative_filter}")
+    queries.extend([
+        # --- Level 2: 强关联搜索 (项目名 + 行业词) ---
+        # 逻辑：必须同时出现 Project Name 和 Crypto 词汇，否则不要
+        f"site:linkedin.com/in/ \"{project_name}\" {_BASE_CTX} {roles} {_NEG}",
+        f"site:linkedin.com/company/ \"{project_name}\" {_BASE_CTX}",
+        # --- Level 3: 兜底搜索 (如果找不到领英，找其他来源) ---
+        f"\"{project_name}\" {_BASE_CTX} team listing contact {_NEG}",
+    ])
     
-    return queries
+    # 保序去重 (忽略大小写和多余空白)，每条重复查询都是一次完整的 Tavily 往返
+    unique = {}
+    for q in queries:
+        unique.setdefault(" ".join(q.lower().split()), q)
+    return list(unique.values())
 
-def execute_search_layer(queries, max_results=5):
-    all_results = []
-    seen_urls = set()
-    
+@st.cache_resource
+def _get_disk_cache():
+    # 跨会话持久化的 Tavily 搜索 + DeepSeek 分析结果缓存 (进程内只打开一次)
+    return diskcache.Cache("./.hunter_cache")
+
+@_get_disk_cache().memoize(expire=86400)
+def _disk_search(query, max_results):
+    return tavily.search(
+        query=query,
+        search_depth="advanced",
+        max_results=max_results,
+        include_answer=False
+    )
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_search(query, max_results):
+    """同一 (query, max_results) 不再重复请求 Tavily"""
+    return _disk_search(query, max_results)
+
+def execute_search_layer(queries, max_results=5, concurrency=5):
     with st.status("🦅 正在执行瀑布流搜索...", expanded=True) as status:
-        for q in queries:
-            st.write(f"📡 扫描: {q}")
-            try:
-                response = tavily.search(
-                    query=q,
-                    search_depth="advanced",
-                    max_results=max_results,
-                    include_answer=False
-                )
-                
-                for r in response.get('results', []):
-                    # 再次在代码层做一次过滤，防止 API 漏网之鱼
-                    content_lower = (r['title'] + r['content']).lower()
-                    if "steak" in content_lower or "restaurant" in content_lower or "menu" in content_lower:
-                        continue # 丢弃餐厅结果
-                        
-                    if r['url'] not in seen_urls:
-                        all_results.append(r)
-                        seen_urls.add(r['url'])
-                        
-            except Exception as e:
-                print(f"Query failed: {q} - {e}")
+        # 并发扫描：所有查询同时发出，信号量限制同时在途的请求数
+        async def _run_all():
+            sem = asyncio.Semaphore(concurrency)
+
+            async def _run(q):
+                async with sem:
+                    try:
+                        response = await asyncio.to_thread(_cached_search, q, max_results)
+                    except Exception as e:
+                        print(f"Query failed: {q} - {e}")
+                        st.write(f"⚠️ 扫描失败: {q}")
+                        return []
+                st.write(f"📡 扫描: {q}")
+                return response.get('results', [])
+
+            return await asyncio.gather(*[_run(q) for q in queries])
+
+        batches = asyncio.run(_run_all())
+        
+        # 合并为列式数组 (保持查询顺序)，再整列一次完成过滤 + 去重
+        urls, titles, contents = [], [], []
+        for results in batches:
+            for r in results:
+                urls.append(r['url'])
+                titles.append(r['title'])
+                contents.append(r['content'])
         
-        status.update(label=f"✅ 捕获 {len(all_results)} 条有效情报，开始 AI 分析...", state="running", expanded=False)
+        urls_s = pd.Series(urls, dtype=object)
+        titles_s = pd.Series(titles, dtype=object)
+        contents_s = pd.Series(contents, dtype=object)
+        
+        # 再次在代码层做一次过滤，防止 API 漏网之鱼 (丢弃餐厅结果)
+        keep = ~(titles_s.str.contains(_BLACKLIST_RE) | contents_s.str.slice(0, 2000).str.contains(_BLACKLIST_RE))
+        keep &= ~urls_s.where(keep).duplicated()
+        
+        # 只保留 AI 分析用得到的字段，正文截断到 prompt 的上限
+        all_results = {
+            "url": urls_s[keep].tolist(),
+            "title": titles_s[keep].tolist(),
+            "content": contents_s[keep].str.slice(0, _CONTENT_LIMIT).tolist(),
+        }
+        
+        status.update(label=f"✅ 捕获 {len(all_results['url'])} 条有效情报，开始 AI 分析...", state="running", expanded=False)
     
     return all_results
 
@@ -162,74 +258,143 @@ def execute_search_layer(queries, max_results=5):
 # 4. 修复版 AI 分析 (Scope Fix + URL Fix)
 # ============================================================================
 
-def normalize_url(url):
-    """修复 URL 跳转问题"""
-    if not url or not isinstance(url, str): return None
-    url = url.strip()
-    if len(url) < 5 or "none" in url.lower() or "n/a" in url.lower(): return None
+def normalize_url_series(s):
+    """修复 URL 跳转问题 (整列一次处理)"""
+    # 非字符串单元格 (None / list / 数字) 视为无效，避免被转成 "['...']" 之类的字符串
+    s = s.where(s.map(type).eq(str)).astype("string")
+    lowered = s.str.lower()
+    mask_bad = s.isna() | lowered.str.contains("none", regex=False) | lowered.str.contains("n/a", regex=False)
+    
+    # 快速路径：LLM 通常已返回规范的 https:// 链接，整列都规范时无需 strip / 补全
+    canonical = s.str.startswith(_SCHEMES) & ~s.str.contains(r"\s")
+    if (mask_bad | canonical).all():
+        return s.mask(mask_bad)
+    
+    s = s.str.strip()
+    s = s.mask(mask_bad | (s.str.len() < 5))
     
     # 补全协议
-    if not url.startswith("http"):
-        return "https://" + url
-    return url
+    needs_proto = s.notna() & ~s.str.startswith(_SCHEMES).fillna(False)
+    return s.mask(needs_proto, "https://" + s)
+
+def _is_profile_url(url):
+    """领英或推特链接，会被放入 URL 注册表"""
+    return "linkedin.com" in url or "x.com" in url
+
+def _worth_analyzing(search_results):
+    """没有领英/推特来源且内容很少时，模型几乎不可能给出有效结果"""
+    return len(search_results['url']) >= 3 or any(_is_profile_url(u) for u in search_results['url'])
+
+def _analysis_key(search_results, fps):
+    """分析缓存的 key：来源集合与顺序无关"""
+    return tuple(sorted(search_results['url'])), tuple(sorted(fps.items()))
+
+def _has_cached_analysis(project_name, search_results, fps):
+    url_key, fps_key = _analysis_key(search_results, fps)
+    return _cached_analysis.__cache_key__(project_name, url_key, fps_key, None, None) in _get_disk_cache()
+
+def _drop_seen(search_results, seen_urls):
+    """去掉本会话已分析过的来源，只把新来源送入 prompt"""
+    rows = [row for row in zip(search_results['url'], search_results['title'], search_results['content']) if row[0] not in seen_urls]
+    urls, titles, contents = zip(*rows) if rows else ((), (), ())
+    return {"url": list(urls), "title": list(titles), "content": list(contents)}
+
+def _merge_results(previous, current):
+    """把新来源的分析结果并入上一次的结果 (人按姓名、渠道按链接去重)"""
+    team = list(previous.get("team", []))
+    names = {str(t.get("name", "")).lower() for t in team}
+    team += [t for t in current.get("team", []) if str(t.get("name", "")).lower() not in names]
+    contacts = list(previous.get("contacts", []))
+    values = {str(c.get("value", "")).lower() for c in contacts}
+    contacts += [c for c in current.get("contacts", []) if str(c.get("value", "")).lower() not in values]
+    return {"team": team, "contacts": contacts}
+
+@st.cache_resource
+def _get_pool():
+    # LLM 调用放到后台线程，脚本线程只负责刷新进度
+    return ThreadPoolExecutor(max_workers=4)
 
 def analyze_with_deepseek(project_name, search_results, fps):
-    # 构建 URL 仓库
-    url_registry = []
-    content_feed = []
+    # 相同的项目 + 来源集合 + 指纹直接命中缓存，跳过 LLM 调用
+    url_key, fps_key = _analysis_key(search_results, fps)
     
-    for idx, r in enumerate(search_results):
-        source_id = f"S{idx+1}"
-        # 只要是领英或推特，都加粗放入注册表
-        if "linkedin.com" in r['url'] or "x.com" in r['url']:
-            url_registry.append(f"[{source_id}] {r['url']} (Title: {r['title']})")
-        
-        content_feed.append(f"Source [{source_id}]\nURL: {r['url']}\nContent: {r['content'][:800]}\n---\n")
+    if not _worth_analyzing(search_results):
+        st.info("⏭️ 已跳过 AI 分析：未捕获到领英/推特来源，请尝试更宽泛的项目名或补充线索。")
+        return {"team": [], "contacts": []}
     
-    registry_text = "\n".join(url_registry)
-    feed_text = "\n".join(content_feed)
+    # 后台线程没有 Streamlit 上下文，只写计数，由脚本线程轮询后更新 UI
+    progress = {"chars": 0}
+    def _on_progress(n_chars):
+        progress["chars"] = n_chars
     
-    prompt = f"""
-    Target Project: "{project_name}"
-    Context: Crypto/Web3 Industry.
-    Detected Fingerprints: {fps}
+    future = _get_pool().submit(_cached_analysis, project_name, url_key, fps_key, search_results, fps, on_progress=_on_progress)
     
-    TASK: Extract verified Team Members and Official Contacts.
+    with st.status("🧠 正在清洗数据并排除无关实体...", expanded=False) as status:
+        st.write(f"📚 已提交 {len(search_results['url'])} 条来源，等待模型返回...")
+        reported = 0
+        while not future.done():
+            wait([future], timeout=0.25)
+            if progress["chars"] != reported:
+                reported = progress["chars"]
+                status.update(label=f"🧠 生成中... 已接收 {reported} 字符")
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            status.update(label="❌ AI 分析失败", state="error")
+            st.error(f"AI Analysis Error: {e}")
+            return None
+        status.update(label="✅ AI 分析完成", state="complete")
+    return result
+
+# 流式输出的 UI 回调不能放进 st.cache_data (会被录制回放)，因此用磁盘缓存，只按前三个参数做 key
+@_get_disk_cache().memoize(expire=3600, ignore={3, 4, "search_results", "fps", "on_progress"})
+def _cached_analysis(project_name, url_key, fps_key, search_results, fps, on_progress=None):
+    # 构建 URL 仓库 (写入同一个缓冲区，避免逐条生成中间字符串)
+    registry_buf = io.StringIO()
+    feed_buf = io.StringIO()
     
-    CRITICAL RULES:
-    1. **NO STEAKHOUSES**: If the content is about food/restaurants (e.g. "Fogo de Chao"), IGNORE IT.
-    2. **LINK MATCHING**: You MUST try to find a URL from the "URL REGISTRY" for every person.
-       - If you see "Stephen Chen" in Source S1, and S1's URL is a LinkedIn profile, USE IT.
-       - Do NOT output "LinkedIn Profile" as text. Output the actual URL or "N/A".
-    3. **RECALL**: If you find a person but no link, list them anyway.
+    sources = zip(search_results['url'], search_results['title'], search_results['content'])
+    for idx, (url, title, content) in enumerate(sources):
+        source_id = f"S{idx+1}"
+        # 只要是领英或推特，都加粗放入注册表
+        if _is_profile_url(url):
+            sep = "\n" if registry_buf.tell() else ""
+            registry_buf.write(f"{sep}[{source_id}] {url} (Title: {title})")
+        
+        sep = "\n" if idx else ""
+        feed_buf.write(f"{sep}Source [{source_id}]\nURL: {url}\nContent: {content}\n---\n")
     
-    URL REGISTRY (Pick links from here):
-    {registry_text}
+    registry_text = registry_buf.getvalue()
+    feed_text = feed_buf.getvalue()
     
-    SEARCH CONTENT:
-    {feed_text}
+    prompt = _PROMPT_TMPL.format(project=project_name, fps=orjson.dumps(fps).decode(), reg=registry_text, feed=feed_text)
     
-    OUTPUT JSON:
-    {{
-        "team": [ {{ "name": "...", "role": "...", "linkedin": "URL/N/A", "twitter": "URL/N/A" }} ],
-        "contacts": [ {{ "type": "...", "value": "...", "note": "..." }} ]
-    }}
-    """
+    stream = llm.chat.completions.create(
+        model="deepseek-chat",
+        messages=[
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+        response_format={ "type": "json_object" },
+        stream=True
+    )
     
-    try:
-        response = llm.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a JSON extractor. Output valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            response_format={ "type": "json_object" }
-        )
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        st.error(f"AI Analysis Error: {e}")
-        return None
+    # 边收边拼，每 ~500 字符刷新一次进度，避免逐 chunk 推送 UI
+    parts = []
+    n_chars, last_report = 0, 0
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            n_chars += len(delta)
+            if on_progress and n_chars - last_report >= 500:
+                on_progress(n_chars)
+                last_report = n_chars
+    return orjson.loads("".join(parts))
 
 # ============================================================================
 # 5. 主界面
@@ -260,7 +425,15 @@ if st.button("🚀 启动深潜模式", type="primary"):
     if not target_project:
         st.toast("⚠️ 请输入项目名称")
         st.stop()
-        
+    
+    # 重依赖 (客户端 SDK / pandas) 延迟到真正开始搜索时才导入
+    import pandas as pd
+    try:
+        llm, tavily = _get_clients(deepseek_key, tavily_key)
+    except Exception as e:
+        st.error(f"Client Init Error: {e}")
+        st.stop()
+    
     # 1. 智能识别指纹 (修复 Input Error)
     fps = auto_detect_fingerprints(input_website, input_twitter)
     
@@ -276,12 +449,36 @@ if st.button("🚀 启动深潜模式", type="primary"):
     
     # 3. AI 分析 (修复 Scope Error)
     ai_result = None  # 初始化变量
+    result_key = (target_project, category, tuple(sorted(fps.items())))
+    previous = st.session_state.last_results.get(result_key)
+    seen_urls = st.session_state.seen_urls
+    analyzed = None  # 实际送入 AI 的来源
     
-    if raw_data:
-        with st.spinner("🧠 正在清洗数据并排除无关实体..."):
-            ai_result = analyze_with_deepseek(target_project, raw_data, fps)
-    else:
+    if not raw_data["url"]:
         st.error("❌ 全网未找到相关 Crypto 信息。可能原因：项目名拼写错误或该项目没有任何公开 Web3 足迹。")
+    elif previous is None or _has_cached_analysis(target_project, raw_data, fps):
+        # 首次搜索，或同一来源集合已有缓存分析：完整来源送入 (命中缓存时不会调用 LLM)
+        analyzed = raw_data
+        ai_result = analyze_with_deepseek(target_project, analyzed, fps)
+    else:
+        # 同一搜索条件的重复运行：只把新来源送入 prompt，结果并入上一次
+        fresh = _drop_seen(raw_data, seen_urls)
+        if _worth_analyzing(fresh):
+            analyzed = fresh
+            ai_result = analyze_with_deepseek(target_project, analyzed, fps)
+            if ai_result is not None:
+                ai_result = _merge_results(previous, ai_result)
+        else:
+            st.info("♻️ 没有值得重新分析的新来源，以下为本会话上次的分析结果。如需重新分析，请点击侧边栏的「🔄 Reset seen URLs」。")
+            ai_result = previous
+    
+    # 只有真正分析成功的来源才记为已见，失败或被跳过的下次还会重新送入 AI
+    if ai_result is not None and analyzed is not None and _worth_analyzing(analyzed):
+        if len(seen_urls) + len(analyzed["url"]) > _SEEN_URLS_MAX:
+            seen_urls.clear()
+            st.session_state.last_results.clear()
+        seen_urls.update(analyzed["url"])
+        st.session_state.last_results[result_key] = ai_result
     
     # 4. 结果展示
     if ai_result:
@@ -292,7 +489,7 @@ if st.button("🚀 启动深潜模式", type="primary"):
             # 修复 URL
             for col in ["linkedin", "twitter"]:
                 if col in df_team.columns:
-                    df_team[col] = df_team[col].apply(normalize_url)
+                    df_team[col] = normalize_url_series(df_team[col])
             
             st.dataframe(
                 df_team,
@@ -311,7 +508,7 @@ if st.button("🚀 启动深潜模式", type="primary"):
         if ai_result.get("contacts"):
             df_contacts = pd.DataFrame(ai_result["contacts"])
             if "value" in df_contacts.columns:
-                df_contacts["value"] = df_contacts["value"].apply(normalize_url)
+                df_contacts["value"] = normalize_url_series(df_contacts["value"])
                 
             st.dataframe(
                 df_contacts,
@@ -326,14 +523,17 @@ if st.button("🚀 启动深潜模式", type="primary"):
         st.divider()
         try:
             # 安全导出逻辑
-            export_data = []
+            rows = []
             for t in ai_result.get("team", []):
-                export_data.append({"Type": "Person", "Name": t.get('name'), "Role": t.get('role'), "Link": t.get('linkedin')})
+                rows.append(("Person", t.get('name'), t.get('role'), None, t.get('linkedin')))
             for c in ai_result.get("contacts", []):
-                export_data.append({"Type": "Channel", "Name": c.get('type'), "Desc": c.get('note'), "Link": c.get('value')})
+                rows.append(("Channel", c.get('type'), None, c.get('note'), c.get('value')))
             
-            if export_data:
-                csv = pd.DataFrame(export_data).to_csv(index=False).encode('utf-8')
-                st.download_button("📥 导出结果", data=csv, file_name=f"{target_project}_Hunter_Report.csv")
+            if rows:
+                # 按列组装，直接写入内存缓冲区，download_button 接受 str，无需再 encode
+                cols = dict(zip(["Type", "Name", "Role", "Desc", "Link"], zip(*rows)))
+                buf = io.StringIO()
+                pd.DataFrame(cols).to_csv(buf, index=False)
+                st.download_button("📥 导出结果", data=buf.getvalue(), file_name=f"{target_project}_Hunter_Report.csv", mime="text/csv")
         except Exception as e:
             st.error(f"导出准备失败: {e}")
\ No newline at end of file